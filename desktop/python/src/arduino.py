@@ -2,9 +2,19 @@
 Пример протокола для базовых функций Ардуино
 """
 
+import time
+from typing import Optional
+
+from serialcmd.clock import ClockSync
 from serialcmd.core.respond import RespondPolicy
 from serialcmd.core.result import Result
+from serialcmd.emulator.baud import BaudSwitch
+from serialcmd.emulator.device import Emulator
+from serialcmd.emulator.link import SimulatedLink
+from serialcmd.emulator.macro import MacroInterpreter
 from serialcmd.errorenum import ErrorEnum
+from serialcmd.executor import CommandExecutor
+from serialcmd.protocol import PROBE_PATTERN
 from serialcmd.protocol import Protocol
 from serialcmd.serializers import Struct
 from serialcmd.serializers import u32
@@ -30,6 +40,9 @@ class ArduinoProtocol(Protocol[ArduinoError, bool]):
         self._digital_read = self.addCommand("digitalRead", u8, u8)
         self._millis = self.addCommand("millis", None, u32)
         self._delay = self.addCommand("delay", u32, None)
+        self.addMacroCommands(u8)
+        self.addBaudCommands()
+        self._micros = self.addCommand("micros", None, u32)
 
     def pinMode(self, pin: int, mode: int) -> Result[None, ArduinoError]:
         """Установить режим пина"""
@@ -51,8 +64,137 @@ class ArduinoProtocol(Protocol[ArduinoError, bool]):
         """Оставить ведомое устройство ожидать заданное время"""
         return self._delay.send(duration_ms)
 
+    def micros(self) -> Result[int, ArduinoError]:
+        """Получить время на плате в мкс"""
+        return self._micros.send(None)
+
+    def createClockSync(self, executor: Optional[CommandExecutor] = None) -> ClockSync:
+        """Создать синхронизацию часов хоста и платы"""
+        return ClockSync(self._micros, executor)
+
+
+class ArduinoEmulator(Emulator):
+    """Программная замена платы с прошивкой embedded/arduino-pio"""
+
+    def __init__(self, link: Optional[SimulatedLink] = None, drift: float = 0.0) -> None:
+        """
+        @param link: Модель линии связи
+        @param drift: Относительный дрейф часов платы (1e-6 = 1 ppm)
+        """
+        self.pin_modes = dict[int, int]()
+        self.pin_states = dict[int, int]()
+        self._start = time.monotonic()
+        self._drift = drift
+        self._macro = MacroInterpreter(self, u8, MACRO_COMMANDS, self._sleep, ArduinoError.ok, ArduinoError.fail)
+        self._baud = BaudSwitch(self, len(PROBE_PATTERN), 0.2, ArduinoError.ok, ArduinoError.fail)
+        super().__init__((
+            self._pinMode,
+            self._digitalWrite,
+            self._digitalRead,
+            self._millis,
+            self._delay,
+            self._macro.load,
+            self._macro.run,
+            self._baud.setBaud,
+            self._baud.probe,
+            self._baud.confirm,
+            self._micros,
+        ), u8, link)
+        self.addPollHook(self._baud.poll)
+        self.begin(u8, 0x01)
+
+    @staticmethod
+    def _isDigitalPin(pin: int) -> bool:
+        return pin < 14
+
+    @staticmethod
+    def _sleep(duration_ms: int) -> None:
+        time.sleep(duration_ms / 1000)
+
+    def _pinMode(self, stream: Stream) -> None:
+        pin, mode = Struct((u8, u8)).read(stream)
+        self.pin_modes[pin] = mode
+        u8.write(stream, ArduinoError.ok)
+
+    def _digitalWrite(self, stream: Stream) -> None:
+        pin = u8.read(stream)
+
+        if not self._isDigitalPin(pin):
+            u8.write(stream, ArduinoError.fail)
+            return
+
+        self.pin_states[pin] = u8.read(stream)
+        u8.write(stream, ArduinoError.ok)
+
+    def _digitalRead(self, stream: Stream) -> None:
+        pin = u8.read(stream)
+
+        if not self._isDigitalPin(pin):
+            u8.write(stream, ArduinoError.fail)
+            return
+
+        u8.write(stream, ArduinoError.ok)
+        u8.write(stream, self.pin_states.get(pin, 0))
+
+    def _getTime(self) -> float:
+        return (time.monotonic() - self._start) * (1 + self._drift)
+
+    def _millis(self, stream: Stream) -> None:
+        u8.write(stream, ArduinoError.ok)
+        u32.write(stream, int(self._getTime() * 1e3) & 0xFFFFFFFF)
+
+    def _micros(self, stream: Stream) -> None:
+        u8.write(stream, ArduinoError.ok)
+        u32.write(stream, int(self._getTime() * 1e6) & 0xFFFFFFFF)
+
+    def _delay(self, stream: Stream) -> None:
+        self._sleep(u32.read(stream))
+        u8.write(stream, ArduinoError.ok)
+
+
+MACRO_COMMANDS = (0x00, 0x01, 0x02, 0x03, 0x04, 0x0A)
+"""Коды команд, доступных из макроса (pinMode, digitalWrite, digitalRead, millis, delay, micros), как macro_commands прошивки"""
 
 INPUT = 0x0
 OUTPUT = 0x1
 INPUT_PULLUP = 0x2
 LED_BUILTIN = 13
+
+
+def _test():
+    link = SimulatedLink(115200, latency=0.001)
+    arduino = ArduinoProtocol(ArduinoEmulator(link))
+    print(f"{arduino.begin()=}")
+
+    def _blink() -> None:
+        arduino.digitalWrite(LED_BUILTIN, True)
+        arduino.digitalWrite(LED_BUILTIN, False)
+
+    with arduino.record() as recorder:
+        with recorder.loop(100):
+            _blink()
+
+        arduino.digitalRead(LED_BUILTIN)
+
+    macro = recorder.compile()
+    print(macro, macro.program.hex())
+    print(f"{arduino.loadMacro(macro)=}")
+
+    results = arduino.runMacro().unwrap()
+    print(f"{len(results)=}, {results[-1]=}")
+
+    n = 100
+    start = link.getTime()
+
+    for _ in range(n):
+        _blink()
+
+    print(f"direct: {(link.getTime() - start) / n * 1e6:.1f} us/blink")
+
+    start = link.getTime()
+    arduino.runMacro()
+    print(f"macro:  {(link.getTime() - start) / 100 * 1e6:.1f} us/blink")
+
+
+if __name__ == '__main__':
+    _test()
@@ -22,6 +22,9 @@ def _launch() -> str:
 
     print(f"Пакет ответа инициализации ведомого устройства: {startup=}")
 
+    baud = arduino.negotiateBaud((2_000_000, 1_000_000, 500_000, 250_000))
+    print(f"Согласованная скорость: {baud=}")
+
     #
 
     arduino.pinMode(LED_BUILTIN, OUTPUT)
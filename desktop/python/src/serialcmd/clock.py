@@ -0,0 +1,213 @@
+"""
+Синхронизация часов хоста и устройства
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from threading import Event
+from threading import Lock
+from threading import Thread
+from typing import Callable
+from typing import Optional
+
+from serialcmd.core.bind import CommandBind
+from serialcmd.errorenum import ErrorEnum
+from serialcmd.executor import CommandExecutor
+
+
+@dataclass(frozen=True)
+class ClockSample:
+    """Результат обмена метками времени"""
+
+    host_time: float
+    """Середина обмена по часам хоста (с)"""
+    device_time: int
+    """Время устройства (мкс, без переполнений)"""
+    round_trip: float
+    """Время обмена (с)"""
+
+
+class ClockSync:
+    """Оценка смещения и дрейфа часов устройства (мкс) относительно часов хоста (с) по NTP-подобным обменам"""
+
+    def __init__(
+            self,
+            command: CommandBind[None, int, ErrorEnum],
+            executor: Optional[CommandExecutor] = None,
+            window: int = 16,
+            device_time_bits: int = 32,
+            clock: Callable[[], float] = time.perf_counter
+    ) -> None:
+        """
+        @param command: Команда получения времени устройства (мкс)
+        @param executor: Исполнитель команд (необходим для периодической синхронизации в фоне)
+        @param window: Количество последних обменов, по которым оцениваются смещение и дрейф
+        @param device_time_bits: Разрядность счётчика времени устройства
+        @param clock: Часы хоста (с)
+        """
+        self._command = command
+        self._executor = executor
+        self._samples = deque[ClockSample](maxlen=window)
+        self._wrap = 1 << device_time_bits
+        self._clock = clock
+        self._lock = Lock()
+        self._base = 0.0
+        self._offset = 0.0
+        self._rate = 1e6
+        self._last_device_time: Optional[int] = None
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def sync(self, pings: int = 8) -> ClockSample:
+        """
+        Выполнить серию обменов и уточнить оценку по обмену с наименьшим временем
+        @param pings: Количество обменов в серии
+        """
+        sample = min((self._ping() for _ in range(pings)), key=lambda s: s.round_trip)
+
+        with self._lock:
+            self._samples.append(sample)
+            self._fit()
+
+        return sample
+
+    def start(self, period: float, pings: int = 8) -> None:
+        """Запустить периодическую синхронизацию в фоновом потоке"""
+        if self._executor is None:
+            raise RuntimeError("Background synchronisation requires an executor")
+
+        if self._thread is not None:
+            raise RuntimeError("Synchronisation is already started")
+
+        self._stop.clear()
+        self._thread = Thread(target=self._run, args=(period, pings), name=f"{self.__class__.__name__}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Остановить периодическую синхронизацию"""
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def toHost(self, device_time: int) -> float:
+        """Перевести метку времени устройства (мкс, допускается переполнение счётчика) в время хоста (с)"""
+        with self._lock:
+            return self._base + (self._unwrap(device_time) - self._offset) / self._rate
+
+    def toDevice(self, host_time: float) -> int:
+        """Перевести время хоста (с) в время устройства (мкс, без переполнений)"""
+        with self._lock:
+            return round(self._offset + (host_time - self._base) * self._rate)
+
+    def now(self) -> int:
+        """Текущее время устройства (мкс) без обмена"""
+        return self.toDevice(self._clock())
+
+    def getDrift(self) -> float:
+        """Относительный дрейф часов устройства (1e-6 = 1 ppm)"""
+        return self._rate / 1e6 - 1
+
+    def getSamples(self) -> tuple[ClockSample, ...]:
+        """Обмены, по которым получена текущая оценка"""
+        with self._lock:
+            return tuple(self._samples)
+
+    def _ping(self) -> ClockSample:
+        start = self._clock()
+
+        if self._executor is None:
+            result = self._command.send(None)
+
+        else:
+            result = self._executor.submit(self._command, None).result()
+
+        end = self._clock()
+        device_time = result.unwrap()
+
+        with self._lock:
+            if self._last_device_time is None:
+                self._last_device_time = device_time
+
+            else:
+                self._last_device_time = self._unwrap(device_time)
+
+        return ClockSample((start + end) / 2, self._last_device_time, end - start)
+
+    def _unwrap(self, device_time: int) -> int:
+        if self._last_device_time is None:
+            return device_time
+
+        delta = (device_time - self._last_device_time) % self._wrap
+
+        if delta >= self._wrap // 2:
+            delta -= self._wrap
+
+        return self._last_device_time + delta
+
+    def _fit(self) -> None:
+        self._base = self._samples[-1].host_time
+
+        if len(self._samples) < 2:
+            self._offset = self._samples[-1].device_time
+            return
+
+        n = len(self._samples)
+        mean_host = sum(s.host_time - self._base for s in self._samples) / n
+        mean_device = sum(s.device_time for s in self._samples) / n
+        variance = sum((s.host_time - self._base - mean_host) ** 2 for s in self._samples)
+
+        if variance > 0:
+            self._rate = sum((s.host_time - self._base - mean_host) * (s.device_time - mean_device) for s in self._samples) / variance
+
+        self._offset = mean_device - self._rate * mean_host
+
+    def _run(self, period: float, pings: int) -> None:
+        while not self._stop.wait(period):
+            self.sync(pings)
+
+
+def _test():
+    from serialcmd.core.respond import RespondPolicy
+    from serialcmd.emulator.device import Emulator
+    from serialcmd.protocol import Protocol
+    from serialcmd.serializers import u32
+    from serialcmd.serializers import u8
+    from serialcmd.streams.abc import Stream
+
+    class TestError(ErrorEnum):
+        ok = 0x00
+
+    drift = 150e-6
+    start = time.perf_counter() - 4294.0
+
+    def _micros(stream: Stream) -> None:
+        u8.write(stream, TestError.ok)
+        u32.write(stream, int((time.perf_counter() - start) * (1 + drift) * 1e6) & 0xFFFFFFFF)
+
+    emulator = Emulator((_micros,), u8)
+    emulator.begin(u8, 0x01)
+
+    protocol = Protocol[TestError, int](RespondPolicy(TestError, u8), u8, emulator, u8)
+    micros = protocol.addCommand("micros", None, u32)
+    protocol.begin()
+
+    with protocol.startExecutor() as executor:
+        clock = ClockSync(micros, executor)
+        clock.sync()
+        clock.start(0.05)
+        time.sleep(1.0)
+        clock.stop()
+
+    print(f"drift: {clock.getDrift() * 1e6:.1f} ppm (expected {drift * 1e6:.1f})")
+
+    host = time.perf_counter()
+    device = int((host - start) * (1 + drift) * 1e6)
+    print(f"error: {(clock.toHost(device & 0xFFFFFFFF) - host) * 1e6:.1f} us")
+
+
+if __name__ == '__main__':
+    _test()
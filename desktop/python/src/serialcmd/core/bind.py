@@ -1,11 +1,17 @@
 from dataclasses import dataclass
+from dataclasses import field
+from typing import TYPE_CHECKING
 
 from serialcmd.core.command import Command
+from serialcmd.core.macro import MacroRecorder
 from serialcmd.core.result import Result
 from serialcmd.errorenum import ErrorEnum
 from serialcmd.serializers import Serializable
 from serialcmd.streams.abc import Stream
 
+if TYPE_CHECKING:
+    from serialcmd.executor import CommandExecutor
+
 
 @dataclass(frozen=True)
 class CommandBind[S: Serializable, R: Serializable, E: ErrorEnum]:
@@ -15,10 +21,25 @@ class CommandBind[S: Serializable, R: Serializable, E: ErrorEnum]:
     """Исполняемая команда"""
     _stream: Stream
     """Привязанный стрим"""
+    _recorders: list[MacroRecorder] = field(default_factory=list)
+    """Стек активных записей макросов (общий для команд протокола)"""
+    _executors: list["CommandExecutor"] = field(default_factory=list)
+    """Запущенный исполнитель, владеющий стримом (общий для команд протокола)"""
 
     def send(self, value: S) -> Result[R, E]:
-        """Отправить команду в поток"""
+        """Отправить команду в поток (Во время записи макроса - записать вызов и вернуть пустой результат)"""
+        if self._recorders:
+            self._recorders[-1].capture(self._command, value)
+            return Result.ok(None)
+
+        if self._executors:
+            raise RuntimeError(f"Stream is owned by {self._executors[0]}, submit commands to it instead")
+
         return self._command.send(self._stream, value)
 
+    def getCommand(self) -> Command[S, R, E]:
+        """Получить исполняемую команду"""
+        return self._command
+
     def __str__(self) -> str:
         return f"({self._stream}) <-> {self._command}"
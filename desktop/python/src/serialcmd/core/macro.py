@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Iterator
+from typing import Sequence
+
+from serialcmd.core.command import Command
+from serialcmd.core.result import Result
+from serialcmd.serializers import Serializable
+from serialcmd.serializers import u16
+from serialcmd.serializers import u32
+from serialcmd.serializers import u8
+from serialcmd.streams.abc import Stream
+
+
+class MacroOpcode(IntEnum):
+    """Коды операций байт-кода макроса"""
+
+    call = 0x01
+    """call<code, u8 size, args> - вызвать команду с упакованными аргументами"""
+
+    loop = 0x02
+    """loop<u16 count> - начать тело цикла"""
+
+    end = 0x03
+    """end - конец тела цикла"""
+
+    delay = 0x04
+    """delay<u32 ms> - ожидание на устройстве"""
+
+
+@dataclass(frozen=True)
+class MacroLoop:
+    """Цикл макроса"""
+
+    count: int
+    """Количество повторений"""
+    body: tuple[Command | MacroLoop, ...]
+    """Тело цикла"""
+
+
+@dataclass(frozen=True)
+class Macro:
+    """Скомпилированная программа макроса"""
+
+    program: bytes
+    """Байт-код программы"""
+    steps: tuple[Command | MacroLoop, ...]
+    """Команды программы для разбора ответа"""
+
+    def getCallsCount(self) -> int:
+        """Количество вызовов команд за один запуск"""
+        return _countCalls(self.steps)
+
+    def read(self, stream: Stream) -> tuple[Result, ...]:
+        """Считать результаты всех вызовов в порядке исполнения"""
+        return tuple(command.respond_policy.read(stream, command.returns) for command in _expand(self.steps))
+
+    def __str__(self) -> str:
+        return f"Macro<{len(self.program)} bytes, {self.getCallsCount()} calls>"
+
+
+def _expand(steps: Sequence[Command | MacroLoop]) -> Iterator[Command]:
+    for step in steps:
+        if isinstance(step, MacroLoop):
+            for _ in range(step.count):
+                yield from _expand(step.body)
+
+        else:
+            yield step
+
+
+def _countCalls(steps: Sequence[Command | MacroLoop]) -> int:
+    return sum(step.count * _countCalls(step.body) if isinstance(step, MacroLoop) else 1 for step in steps)
+
+
+class MacroRecorder:
+    """Запись вызовов команд в программу макроса"""
+
+    def __init__(self, recorders: list[MacroRecorder]) -> None:
+        """
+        @param recorders: Стек активных записей протокола
+        """
+        self._recorders = recorders
+        self._program = bytearray()
+        self._frames: list[list[Command | MacroLoop]] = [[]]
+
+    def capture(self, command: Command, value: Serializable) -> None:
+        """Записать вызов команды"""
+        args = b"" if command.instruction.signature is None else command.instruction.signature.pack(value)
+
+        if len(args) > 0xFF:
+            raise ValueError(f"Arguments of {command.instruction.name} are too large for macro: {len(args)}")
+
+        self._program += u8.pack(MacroOpcode.call) + command.instruction.code + u8.pack(len(args)) + args
+        self._frames[-1].append(command)
+
+    def delay(self, duration_ms: int) -> None:
+        """Записать ожидание на устройстве"""
+        if not 0 <= duration_ms <= 0xFFFFFFFF:
+            raise ValueError(f"Invalid delay: {duration_ms}")
+
+        self._program += u8.pack(MacroOpcode.delay) + u32.pack(duration_ms)
+
+    @contextmanager
+    def loop(self, count: int) -> Iterator[None]:
+        """Повторить записанные в контексте вызовы count раз"""
+        if not 0 < count <= 0xFFFF:
+            raise ValueError(f"Invalid loop count: {count}")
+
+        self._program += u8.pack(MacroOpcode.loop) + u16.pack(count)
+        self._frames.append([])
+
+        try:
+            yield
+
+        finally:
+            body = self._frames.pop()
+            self._program += u8.pack(MacroOpcode.end)
+            self._frames[-1].append(MacroLoop(count, tuple(body)))
+
+    def compile(self) -> Macro:
+        """Получить программу макроса"""
+        if len(self._frames) != 1:
+            raise RuntimeError("Cannot compile macro inside unfinished loop")
+
+        return Macro(bytes(self._program), tuple(self._frames[0]))
+
+    def __enter__(self) -> MacroRecorder:
+        self._recorders.append(self)
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._recorders.remove(self)
+
+
+def _test():
+    from serialcmd.core.instruction import Instruction
+    from serialcmd.core.respond import RespondPolicy
+    from serialcmd.errorenum import ErrorEnum
+    from serialcmd.serializers import Struct
+
+    class TestError(ErrorEnum):
+        ok = 0x00
+
+    policy = RespondPolicy(TestError, u8)
+    write = Command(Instruction(b"\x01", Struct((u8, u8)), "write"), None, policy)
+    read = Command(Instruction(b"\x02", u8, "read"), u8, policy)
+
+    with MacroRecorder([]) as recorder:
+        with recorder.loop(3):
+            recorder.capture(write, (13, 1))
+            recorder.delay(100)
+            recorder.capture(write, (13, 0))
+
+        recorder.capture(read, 13)
+
+    macro = recorder.compile()
+    print(macro)
+    print(macro.program.hex())
+
+
+if __name__ == '__main__':
+    _test()
@@ -0,0 +1,92 @@
+import time
+from typing import Callable
+from typing import Optional
+
+from serialcmd.emulator.device import Emulator
+from serialcmd.serializers import u32
+from serialcmd.serializers import u8
+from serialcmd.streams.abc import Stream
+
+
+class BaudSwitch:
+    """Смена скорости на стороне устройства (обработчики команд setBaud, probe и confirmBaud)"""
+
+    def __init__(
+            self,
+            device: Emulator,
+            probe_size: int,
+            timeout: float = 0.2,
+            ok: int = 0x00,
+            error: int = 0x01,
+            min_baud: int = 1200,
+            max_baud: int = 2_000_000,
+            clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """
+        @param device: Устройство
+        @param probe_size: Размер пробного шаблона (байт)
+        @param timeout: Время ожидания подтверждения новой скорости (с), после которого устройство возвращает прежнюю
+        @param ok: Код успешного результата
+        @param error: Код ошибки
+        @param min_baud: Минимальная поддерживаемая скорость
+        @param max_baud: Максимальная поддерживаемая скорость
+        @param clock: Часы устройства (с)
+        """
+        self._device = device
+        self._probe_size = probe_size
+        self._timeout = timeout
+        self._ok = ok
+        self._error = error
+        self._min_baud = min_baud
+        self._max_baud = max_baud
+        self._clock = clock
+        self._fallback_baud: Optional[int] = None
+        self._deadline = 0.0
+
+    def isPending(self) -> bool:
+        """Ожидается ли подтверждение новой скорости"""
+        return self._fallback_baud is not None
+
+    def setBaud(self, stream: Stream) -> None:
+        """setBaud(u32) -> None, ответ на прежней скорости"""
+        baud = u32.read(stream)
+
+        if not self._min_baud <= baud <= self._max_baud:
+            u8.write(stream, self._error)
+            return
+
+        u8.write(stream, self._ok)
+
+        link = self._device.getLink()
+
+        if not self.isPending():
+            self._fallback_baud = link.device_baud
+
+        link.device_baud = baud
+        self._deadline = self._clock() + self._timeout
+        self._device.setCommandFilter(self._isAllowed)
+
+    def probe(self, stream: Stream) -> None:
+        """probe(u8[n]) -> u8[n] - эхо пробного шаблона"""
+        pattern = stream.read(self._probe_size)
+        u8.write(stream, self._ok)
+        stream.write(pattern)
+
+    def confirm(self, stream: Stream) -> None:
+        """confirmBaud(None) -> None - закрепить новую скорость (повторное подтверждение также успешно)"""
+        self._fallback_baud = None
+        self._device.setCommandFilter(None)
+        u8.write(stream, self._ok)
+
+    def poll(self) -> None:
+        """Вернуть прежнюю скорость, если новая не подтверждена вовремя (регистрируется через Emulator.addPollHook)"""
+        if not self.isPending() or self._clock() < self._deadline:
+            return
+
+        self._device.getLink().device_baud = self._fallback_baud
+        self._fallback_baud = None
+        self._device.setCommandFilter(None)
+        self._device.flushReceived()
+
+    def _isAllowed(self, code: int) -> bool:
+        return self._device.getHandler(code) in (self.probe, self.confirm)
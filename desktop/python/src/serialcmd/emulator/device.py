@@ -0,0 +1,194 @@
+from typing import Callable
+from typing import Optional
+from typing import Sequence
+
+from serialcmd.emulator.link import SimulatedLink
+from serialcmd.serializers import Primitive
+from serialcmd.serializers import Serializable
+from serialcmd.serializers import Serializer
+from serialcmd.streams.abc import BaudStream
+from serialcmd.streams.abc import Stream
+
+Handler = Callable[[Stream], None]
+"""Обработчик команды на стороне устройства (аналог void(*)(StreamSerializer &))"""
+
+
+class _Underflow(Exception):
+    """Команда получена не полностью"""
+
+
+class _DeviceStream(Stream):
+    """Стрим со стороны устройства: чтение принятых байт, запись ответа"""
+
+    def __init__(self, rx: bytearray, tx: bytearray, link: SimulatedLink) -> None:
+        self._rx = rx
+        self._tx = tx
+        self._link = link
+        self.position = 0
+
+    def read(self, size: int = 1) -> bytes:
+        end = self.position + size
+
+        if end > len(self._rx):
+            raise _Underflow()
+
+        ret = bytes(self._rx[self.position:end])
+        self.position = end
+        return ret
+
+    def write(self, data: bytes) -> None:
+        self._tx.extend(self._link.toHost(data))
+
+
+class _ArgsStream(Stream):
+    """Стрим исполнения команды из памяти: чтение аргументов из буфера, запись ответа в поток"""
+
+    def __init__(self, args: bytes, output: Stream) -> None:
+        self._args = args
+        self._output = output
+        self._position = 0
+
+    def read(self, size: int = 1) -> bytes:
+        ret = self._args[self._position:self._position + size]
+        self._position += size
+        return ret
+
+    def write(self, data: bytes) -> None:
+        self._output.write(data)
+
+
+class Emulator(BaudStream):
+    """Программная замена ведомого устройства (аналог serialcmd::Protocol прошивки)"""
+
+    def __init__(self, commands: Sequence[Handler], command_code_primitive: Primitive[int], link: Optional[SimulatedLink] = None) -> None:
+        """
+        @param commands: Таблица обработчиков команд (индекс - код инструкции)
+        @param command_code_primitive: Примитивный тип упаковки индексов команд
+        @param link: Модель линии связи (по умолчанию - без ошибок на 115200)
+        """
+        self._commands = commands
+        self._command_code_primitive = command_code_primitive
+        self._link = link or SimulatedLink(115200)
+        self._rx = bytearray()
+        self._tx = bytearray()
+        self._device = _DeviceStream(self._rx, self._tx, self._link)
+        self._poll_hooks = list[Callable[[], None]]()
+        self._command_filter: Optional[Callable[[int], bool]] = None
+
+    def begin[T: Serializable](self, startup_package: Serializer[T], value: T) -> None:
+        """Отправить пакет инициализации"""
+        startup_package.write(self._device, value)
+
+    def pull(self) -> bool:
+        """Обработать одну полностью принятую команду"""
+        self._poll()
+        self._device.position = 0
+        tx_size = len(self._tx)
+
+        try:
+            code = self._command_code_primitive.read(self._device)
+            handler = self.getHandler(code)
+
+            if handler is not None and (self._command_filter is None or self._command_filter(code)):
+                handler(self._device)
+
+        except _Underflow:
+            del self._tx[tx_size:]
+            return False
+
+        del self._rx[:self._device.position]
+        return True
+
+    def execute(self, code: int, args: bytes, output: Stream) -> None:
+        """Исполнить команду с заданными аргументами, направив ответ в output"""
+        handler = self.getHandler(code)
+
+        if handler is not None:
+            handler(_ArgsStream(args, output))
+
+    def getHandler(self, code: int) -> Optional[Handler]:
+        """Получить обработчик команды по коду"""
+        if code < len(self._commands):
+            return self._commands[code]
+
+        return None
+
+    def getCommandCodePrimitive(self) -> Primitive[int]:
+        """Примитивный тип упаковки индексов команд"""
+        return self._command_code_primitive
+
+    def getLink(self) -> SimulatedLink:
+        """Модель линии связи"""
+        return self._link
+
+    def addPollHook(self, hook: Callable[[], None]) -> None:
+        """Добавить действие, выполняемое перед приёмом и обработкой данных (аналог кода в loop())"""
+        self._poll_hooks.append(hook)
+
+    def setCommandFilter(self, command_filter: Optional[Callable[[int], bool]]) -> None:
+        """Установить фильтр кодов команд: отклонённые команды отбрасываются без обработки"""
+        self._command_filter = command_filter
+
+    def flushReceived(self) -> None:
+        """Отбросить принятые устройством данные"""
+        self._rx.clear()
+
+    def write(self, data: bytes) -> None:
+        self._poll()
+        self._rx.extend(self._link.toDevice(data))
+
+    def read(self, size: int = 1) -> bytes:
+        while len(self._tx) < size and self.pull():
+            pass
+
+        ret = bytes(self._tx[:size])
+        del self._tx[:size]
+        return ret
+
+    def setBaud(self, baud: int) -> None:
+        self._link.host_baud = baud
+
+    def getBaud(self) -> int:
+        return self._link.host_baud
+
+    def setTimeout(self, timeout: Optional[float]) -> None:
+        pass
+
+    def getTimeout(self) -> Optional[float]:
+        return None
+
+    def clearInput(self) -> None:
+        while self.pull():
+            pass
+
+        self._tx.clear()
+
+    def _poll(self) -> None:
+        for hook in self._poll_hooks:
+            hook()
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}@{id(self):x}"
+
+
+def _test():
+    from serialcmd.serializers import u8
+
+    def _echo(stream: Stream) -> None:
+        v = u8.read(stream)
+        u8.write(stream, 0x00)
+        u8.write(stream, v + 1)
+
+    emulator = Emulator((_echo,), u8)
+    emulator.begin(u8, 0x01)
+
+    print(emulator.read(1).hex())
+
+    emulator.write(b"\x00")
+    emulator.write(b"\x68")
+
+    print(emulator.read(2).hex())
+
+
+if __name__ == '__main__':
+    _test()
@@ -0,0 +1,66 @@
+from random import Random
+from typing import Mapping
+from typing import Optional
+
+
+class SimulatedLink:
+    """Модель последовательной линии между хостом и устройством"""
+
+    def __init__(
+            self,
+            baud: int,
+            error_rates: Optional[Mapping[int, float]] = None,
+            latency: float = 0.0,
+            frame_bits: int = 10,
+            seed: Optional[int] = None
+    ) -> None:
+        """
+        @param baud: Начальная скорость обеих сторон
+        @param error_rates: Вероятность искажения байта для каждой скорости (по умолчанию 0)
+        @param latency: Задержка при смене направления передачи (с), например, опрос USB
+        @param frame_bits: Бит в кадре одного байта (8N1 - 10)
+        @param seed: Зерно генератора ошибок
+        """
+        self.host_baud = baud
+        """Скорость хоста"""
+        self.device_baud = baud
+        """Скорость устройства"""
+        self._error_rates = error_rates or {}
+        self._latency = latency
+        self._frame_bits = frame_bits
+        self._random = Random(seed)
+        self._time = 0.0
+        self._to_device: Optional[bool] = None
+
+    def toDevice(self, data: bytes) -> bytes:
+        """Передать данные от хоста устройству"""
+        return self._transmit(data, self.host_baud, self.device_baud, True)
+
+    def toHost(self, data: bytes) -> bytes:
+        """Передать данные от устройства хосту"""
+        return self._transmit(data, self.device_baud, self.host_baud, False)
+
+    def getTime(self) -> float:
+        """Модельное время линии (с): передача байт и задержки смены направления"""
+        return self._time
+
+    def getErrorRate(self, baud: int) -> float:
+        """Вероятность искажения байта на скорости"""
+        return self._error_rates.get(baud, 0.0)
+
+    def _transmit(self, data: bytes, sender_baud: int, receiver_baud: int, to_device: bool) -> bytes:
+        if self._to_device != to_device:
+            self._to_device = to_device
+            self._time += self._latency
+
+        self._time += len(data) * self._frame_bits / sender_baud
+
+        if sender_baud != receiver_baud:
+            return self._random.randbytes(len(data))
+
+        error_rate = self.getErrorRate(sender_baud)
+
+        if error_rate == 0.0:
+            return data
+
+        return bytes(b ^ self._random.randrange(1, 0x100) if self._random.random() < error_rate else b for b in data)
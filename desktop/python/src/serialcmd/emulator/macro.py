@@ -0,0 +1,141 @@
+from typing import Callable
+from typing import Collection
+
+from serialcmd.core.macro import MacroOpcode
+from serialcmd.emulator.device import Emulator
+from serialcmd.serializers import Bytes
+from serialcmd.serializers import Primitive
+from serialcmd.serializers import u16
+from serialcmd.serializers import u32
+from serialcmd.serializers import u8
+from serialcmd.streams.abc import Stream
+
+
+class MacroInterpreter:
+    """Исполнитель макросов на стороне устройства (обработчики команд macroLoad и macroRun)"""
+
+    def __init__(
+            self,
+            device: Emulator,
+            program_length: Primitive[int],
+            callable_codes: Collection[int],
+            delay: Callable[[int], None],
+            ok: int = 0x00,
+            error: int = 0x01,
+            capacity: int = 128,
+            max_depth: int = 4
+    ) -> None:
+        """
+        @param device: Устройство, команды которого вызывает макрос
+        @param program_length: Примитивный тип длины программы
+        @param callable_codes: Коды команд, которые можно вызывать из макроса
+        @param delay: Функция ожидания (мс)
+        @param ok: Код успешного результата
+        @param error: Код ошибки
+        @param capacity: Максимальный размер программы
+        @param max_depth: Максимальная вложенность циклов
+        """
+        self._device = device
+        self._program_length = program_length
+        self._callable_codes = frozenset(callable_codes)
+        self._delay = delay
+        self._ok = ok
+        self._error = error
+        self._capacity = capacity
+        self._max_depth = max_depth
+        self._program = b""
+
+    def load(self, stream: Stream) -> None:
+        """macroLoad(bytes) -> None"""
+        program = Bytes(self._program_length).read(stream)
+
+        if len(program) > self._capacity or not self._isValid(program):
+            self._program = b""
+            u8.write(stream, self._error)
+            return
+
+        self._program = program
+        u8.write(stream, self._ok)
+
+    def run(self, stream: Stream) -> None:
+        """macroRun(None) -> None, затем результаты вызовов"""
+        if len(self._program) == 0:
+            u8.write(stream, self._error)
+            return
+
+        u8.write(stream, self._ok)
+
+        code_primitive = self._device.getCommandCodePrimitive()
+        code_size = code_primitive.getSize()
+        loops = list[list[int]]()
+        pc = 0
+
+        while pc < len(self._program):
+            opcode = self._program[pc]
+            pc += 1
+
+            match opcode:
+                case MacroOpcode.call:
+                    code = code_primitive.unpack(self._program[pc:pc + code_size])
+                    size = self._program[pc + code_size]
+                    pc += code_size + 1
+                    self._device.execute(code, self._program[pc:pc + size], stream)
+                    pc += size
+
+                case MacroOpcode.loop:
+                    loops.append([pc + u16.getSize(), u16.unpack(self._program[pc:pc + u16.getSize()])])
+                    pc += u16.getSize()
+
+                case MacroOpcode.end:
+                    loops[-1][1] -= 1
+
+                    if loops[-1][1] > 0:
+                        pc = loops[-1][0]
+
+                    else:
+                        loops.pop()
+
+                case MacroOpcode.delay:
+                    self._delay(u32.unpack(self._program[pc:pc + u32.getSize()]))
+                    pc += u32.getSize()
+
+    def _isValid(self, program: bytes) -> bool:
+        code_primitive = self._device.getCommandCodePrimitive()
+        code_size = code_primitive.getSize()
+        depth = 0
+        pc = 0
+
+        while pc < len(program):
+            opcode = program[pc]
+            pc += 1
+
+            match opcode:
+                case MacroOpcode.call:
+                    if pc + code_size >= len(program):
+                        return False
+
+                    if code_primitive.unpack(program[pc:pc + code_size]) not in self._callable_codes:
+                        return False
+
+                    pc += code_size + 1 + program[pc + code_size]
+
+                case MacroOpcode.loop:
+                    if pc + u16.getSize() > len(program) or depth == self._max_depth or u16.unpack(program[pc:pc + u16.getSize()]) == 0:
+                        return False
+
+                    depth += 1
+                    pc += u16.getSize()
+
+                case MacroOpcode.end:
+                    if depth == 0:
+                        return False
+
+                    depth -= 1
+
+                case MacroOpcode.delay:
+                    pc += u32.getSize()
+
+                case _:
+                    return False
+
+        return depth == 0 and pc == len(program)
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future
+from queue import Empty
+from queue import SimpleQueue
+from threading import Lock
+from threading import Thread
+from typing import Callable
+from typing import Optional
+
+from serialcmd.core.bind import CommandBind
+from serialcmd.core.command import Command
+from serialcmd.core.result import Result
+from serialcmd.errorenum import ErrorEnum
+from serialcmd.serializers import Serializable
+from serialcmd.streams.abc import Stream
+
+_Request = tuple[Command, Serializable, Future]
+
+
+class CommandExecutor:
+    """Исполнитель команд в фоновом потоке: единственный владелец стрима, конвейерная отправка"""
+
+    def __init__(
+            self,
+            stream: Stream,
+            window: int = 8,
+            owners: Optional[list[CommandExecutor]] = None,
+            has_variable_response: Optional[Callable[[CommandBind], bool]] = None
+    ) -> None:
+        """
+        @param stream: Стрим (Канал связи), не используемый другими потоками
+        @param window: Максимальное количество отправленных команд, ожидающих ответа
+        @param owners: Список владельцев стрима протокола: исполнитель находится в нём до завершения работы
+        @param has_variable_response: Зависит ли ответ команды от состояния устройства (такие команды не принимаются)
+        """
+        if window < 1:
+            raise ValueError(f"Invalid window: {window}")
+
+        self._stream = stream
+        self._window = window
+        self._owners = owners if owners is not None else []
+        self._has_variable_response = has_variable_response
+        self._queue = SimpleQueue[Optional[_Request]]()
+        self._is_shutdown = False
+        self._shutdown_lock = Lock()
+        self._thread = Thread(target=self._run, name=f"{self}", daemon=True)
+        self._owners.append(self)
+        self._thread.start()
+
+    def submit[S: Serializable, R: Serializable, E: ErrorEnum](self, command: CommandBind[S, R, E], value: S) -> Future[Result[R, E]]:
+        """Поставить команду в очередь отправки (потокобезопасно)"""
+        if self._has_variable_response is not None and self._has_variable_response(command):
+            raise ValueError(f"Cannot submit {command.getCommand().instruction.name}: its response size is not known from the command")
+
+        future = Future[Result[R, E]]()
+
+        with self._shutdown_lock:
+            if self._is_shutdown:
+                raise RuntimeError("Cannot submit command after shutdown")
+
+            self._queue.put((command.getCommand(), value, future))
+
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Завершить работу после исполнения поставленных в очередь команд"""
+        with self._shutdown_lock:
+            if not self._is_shutdown:
+                self._is_shutdown = True
+                self._queue.put(None)
+
+        if wait:
+            self._thread.join()
+
+    def _run(self) -> None:
+        try:
+            self._process()
+
+        finally:
+            self._cancelPending()
+            self._owners.remove(self)
+
+    def _cancelPending(self) -> None:
+        with self._shutdown_lock:
+            self._is_shutdown = True
+
+        while True:
+            try:
+                request = self._queue.get_nowait()
+
+            except Empty:
+                return
+
+            if request is not None:
+                _, _, future = request
+
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(RuntimeError("Executor is shut down"))
+
+    def _process(self) -> None:
+        in_flight = deque[tuple[Command, Future]]()
+        running = True
+
+        while running or in_flight:
+            while running and len(in_flight) < self._window:
+                try:
+                    request = self._queue.get(block=len(in_flight) == 0)
+
+                except Empty:
+                    break
+
+                if request is None:
+                    running = False
+                    break
+
+                command, value, future = request
+
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                try:
+                    command.instruction.send(self._stream, value)
+
+                except Exception as e:
+                    future.set_exception(e)
+                    continue
+
+                in_flight.append((command, future))
+
+            if in_flight:
+                command, future = in_flight.popleft()
+
+                try:
+                    future.set_result(command.respond_policy.read(self._stream, command.returns))
+
+                except Exception as e:
+                    future.set_exception(e)
+
+    def __enter__(self) -> CommandExecutor:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.shutdown()
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}<{self._stream}>"
+
+
+def _test():
+    from concurrent.futures import ThreadPoolExecutor
+    from serialcmd.core.respond import RespondPolicy
+    from serialcmd.emulator.device import Emulator
+    from serialcmd.protocol import Protocol
+    from serialcmd.serializers import u32
+    from serialcmd.serializers import u8
+
+    class TestError(ErrorEnum):
+        ok = 0x00
+
+    def _increment(stream: Stream) -> None:
+        v = u32.read(stream)
+        u8.write(stream, TestError.ok)
+        u32.write(stream, v + 1)
+
+    emulator = Emulator((_increment,), u8)
+    emulator.begin(u8, 0x01)
+
+    protocol = Protocol[TestError, int](RespondPolicy(TestError, u8), u8, emulator, u8)
+    increment = protocol.addCommand("increment", u32, u32)
+    print(f"{protocol.begin()=}")
+
+    with protocol.startExecutor() as executor:
+        def _producer(start: int) -> bool:
+            futures = [executor.submit(increment, i) for i in range(start, start + 1000)]
+            return all(f.result().unwrap() == i + 1 for i, f in zip(range(start, start + 1000), futures))
+
+        with ThreadPoolExecutor(8) as producers:
+            print(all(producers.map(_producer, range(0, 8000, 1000))))
+
+
+if __name__ == '__main__':
+    _test()
@@ -0,0 +1,147 @@
+"""
+Измерение пропускной способности команд на разных скоростях линии
+"""
+
+import struct
+import time
+from dataclasses import dataclass
+from typing import Callable
+from typing import Iterable
+
+from serialcmd.core.bind import CommandBind
+from serialcmd.errorenum import ErrorEnum
+from serialcmd.protocol import Protocol
+from serialcmd.serializers import Serializable
+
+
+@dataclass(frozen=True)
+class LinkSample:
+    """Результат измерения на одной скорости"""
+
+    baud: int
+    """Скорость"""
+    established: bool
+    """Удалось ли согласовать скорость"""
+    calls: int
+    """Количество вызовов"""
+    errors: int
+    """Количество неудачных вызовов (после каждого входные данные сбрасываются)"""
+    elapsed: float
+    """Время выполнения вызовов (с)"""
+
+    def getCallsPerSecond(self) -> float:
+        """Эффективная пропускная способность: успешные вызовы в секунду"""
+        if self.elapsed <= 0:
+            return 0.0
+
+        return (self.calls - self.errors) / self.elapsed
+
+    def __str__(self) -> str:
+        if not self.established:
+            return f"{self.baud} baud: not established"
+
+        return f"{self.baud} baud: {self.getCallsPerSecond():.1f} calls/s (errors {self.errors}/{self.calls})"
+
+
+def probeThroughput[S: Serializable](
+        protocol: Protocol,
+        command: CommandBind[S, Serializable, ErrorEnum],
+        value: S,
+        rates: Iterable[int],
+        calls: int = 100,
+        clock: Callable[[], float] = time.perf_counter,
+        probes: int = 4,
+        timeout: float = 0.25
+) -> list[LinkSample]:
+    """
+    Измерить пропускную способность команды на каждой скорости
+    @param protocol: Протокол с командами смены скорости (стрим - BaudStream)
+    @param command: Измеряемая команда
+    @param value: Аргумент команды
+    @param rates: Проверяемые скорости (порядок перебора)
+    @param calls: Количество вызовов на каждой скорости
+    @param clock: Часы измерения (с)
+    @param probes: Количество пробных обменов при согласовании
+    @param timeout: Таймаут согласования и чтения ответов при измерении (с): потерянный ответ считается ошибкой
+    """
+    samples = list[LinkSample]()
+    stream = protocol.getStream()
+
+    for baud in rates:
+        try:
+            established = protocol.negotiateBaud((baud,), probes, timeout) == baud
+
+        except (struct.error, ValueError):
+            established = False
+
+        if not established:
+            samples.append(LinkSample(baud, False, 0, 0, 0.0))
+            continue
+
+        errors = 0
+        previous_timeout = stream.getTimeout()
+        stream.setTimeout(timeout)
+
+        try:
+            start = clock()
+
+            for _ in range(calls):
+                try:
+                    if command.send(value).isOk():
+                        continue
+
+                except (struct.error, ValueError):
+                    pass
+
+                # Остаток искажённого ответа не должен читаться следующим вызовом
+                errors += 1
+                stream.clearInput()
+
+            elapsed = clock() - start
+
+        finally:
+            stream.setTimeout(previous_timeout)
+
+        samples.append(LinkSample(baud, True, calls, errors, elapsed))
+
+    return samples
+
+
+def _test():
+    from serialcmd.emulator.baud import BaudSwitch
+    from serialcmd.emulator.device import Emulator
+    from serialcmd.emulator.link import SimulatedLink
+    from serialcmd.core.respond import RespondPolicy
+    from serialcmd.protocol import PROBE_PATTERN
+    from serialcmd.serializers import u32
+    from serialcmd.serializers import u8
+    from serialcmd.streams.abc import Stream
+
+    class TestError(ErrorEnum):
+        ok = 0x00
+        fail = 0x01
+
+    def _echo(stream: Stream) -> None:
+        v = u32.read(stream)
+        u8.write(stream, TestError.ok)
+        u32.write(stream, v)
+
+    link = SimulatedLink(115200, {2_000_000: 0.02, 1_000_000: 0.0002}, latency=0.0001, seed=0)
+    commands = [_echo]
+    emulator = Emulator(commands, u8, link)
+    baud = BaudSwitch(emulator, len(PROBE_PATTERN), 0.05)
+    commands += (baud.setBaud, baud.probe, baud.confirm)
+    emulator.addPollHook(baud.poll)
+    emulator.begin(u8, 0x01)
+
+    protocol = Protocol[TestError, int](RespondPolicy(TestError, u8), u8, emulator, u8)
+    echo = protocol.addCommand("echo", u32, u32)
+    protocol.addBaudCommands()
+    print(f"{protocol.begin()=}")
+
+    for sample in probeThroughput(protocol, echo, 0x12345678, (115200, 2_000_000, 1_000_000, 500_000), clock=link.getTime, timeout=0.05):
+        print(sample)
+
+
+if __name__ == '__main__':
+    _test()
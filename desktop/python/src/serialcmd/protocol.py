@@ -1,16 +1,31 @@
+import struct
+import time
+from typing import Final
 from typing import Iterable
 from typing import Optional
 
 from serialcmd.core.bind import CommandBind
 from serialcmd.core.command import Command
 from serialcmd.core.instruction import Instruction
+from serialcmd.core.macro import Macro
+from serialcmd.core.macro import MacroRecorder
 from serialcmd.core.respond import RespondPolicy
+from serialcmd.core.result import Result
 from serialcmd.errorenum import ErrorEnum
+from serialcmd.executor import CommandExecutor
+from serialcmd.serializers import Array
+from serialcmd.serializers import Bytes
 from serialcmd.serializers import Primitive
 from serialcmd.serializers import Serializable
 from serialcmd.serializers import Serializer
+from serialcmd.serializers import u32
+from serialcmd.serializers import u8
+from serialcmd.streams.abc import BaudStream
 from serialcmd.streams.abc import Stream
 
+PROBE_PATTERN: Final[tuple[int, ...]] = (0x55, 0xAA, 0x0F, 0xF0, 0x33, 0xCC, 0x00, 0xFF)
+"""Пробный шаблон проверки линии (чередование битов, полубайтов, крайние значения)"""
+
 
 class Protocol[E: ErrorEnum, T: Serializable]:
     """Протокол - набор команд для последовательной связи"""
@@ -33,9 +48,18 @@ class Protocol[E: ErrorEnum, T: Serializable]:
         self._command_code_primitive = command_code_primitive
         self._stream = stream
         self._startup_package = startup_package
+        self._recorders = list[MacroRecorder]()
+        self._executors = list[CommandExecutor]()
+        self._macro_load: Optional[CommandBind[bytes, None, E]] = None
+        self._macro_run: Optional[CommandBind[None, None, E]] = None
+        self._loaded_macro: Optional[Macro] = None
+        self._set_baud: Optional[CommandBind[int, None, E]] = None
+        self._probe: Optional[CommandBind[tuple[int, ...], tuple[int, ...], E]] = None
+        self._confirm_baud: Optional[CommandBind[None, None, E]] = None
 
     def begin(self) -> T:
         """Начать общение с slave устройством"""
+        self._checkStreamOwner()
         return self._startup_package.read(self._stream)
 
     def addCommand[S: Serializable, R: Serializable](self, name: str, signature: Optional[Serializer[S]], returns: Optional[Serializer[R]]) -> CommandBind[S, R, E]:
@@ -45,10 +69,182 @@ class Protocol[E: ErrorEnum, T: Serializable]:
         @param signature: Сигнатура (типы) входных аргументов
         @param returns: тип выходного значения
         """
-        ret = CommandBind(Command(Instruction(self._getNextInstructionCode(), signature, name), returns, self._respond_policy), self._stream)
+        ret = CommandBind(Command(Instruction(self._getNextInstructionCode(), signature, name), returns, self._respond_policy), self._stream, self._recorders, self._executors)
         self._commands.append(ret)
         return ret
 
+    def addMacroCommands(self, program_length: Primitive[int]) -> None:
+        """
+        Добавить команды загрузки и запуска макросов
+        @param program_length: Примитивный тип длины программы макроса
+        """
+        self._macro_load = self.addCommand("macroLoad", Bytes(program_length), None)
+        self._macro_run = self.addCommand("macroRun", None, None)
+
+    def record(self) -> MacroRecorder:
+        """Начать запись макроса: вызовы команд в контексте записываются в программу, а не отправляются"""
+        return MacroRecorder(self._recorders)
+
+    def loadMacro(self, macro: Macro) -> Result[None, E]:
+        """Загрузить программу макроса на устройство"""
+        command = self._getServiceCommand(self._macro_load)
+        self._loaded_macro = None
+        result = command.send(macro.program)
+
+        if result.isOk():
+            self._loaded_macro = macro
+
+        return result
+
+    def runMacro(self) -> Result[tuple[Result, ...], E]:
+        """Исполнить загруженный макрос и получить результаты всех вызовов"""
+        command = self._getServiceCommand(self._macro_run)
+
+        if self._loaded_macro is None:
+            raise RuntimeError("No macro is loaded")
+
+        result = command.send(None)
+
+        if result.isErr():
+            return result
+
+        return Result.ok(self._loaded_macro.read(self._stream))
+
+    def addBaudCommands(self) -> None:
+        """Добавить команды смены скорости"""
+        self._set_baud = self.addCommand("setBaud", u32, None)
+        self._probe = self.addCommand("probe", Array(u8, len(PROBE_PATTERN)), Array(u8, len(PROBE_PATTERN)))
+        self._confirm_baud = self.addCommand("confirmBaud", None, None)
+
+    def negotiateBaud(self, rates: Iterable[int], probes: int = 4, timeout: float = 0.25) -> int:
+        """
+        Согласовать скорость: перебрать предложенные скорости и остановиться на первой прошедшей проверку
+        @param rates: Скорости в порядке предпочтения
+        @param probes: Количество пробных обменов на каждой скорости
+        @param timeout: Таймаут чтения и ожидания отката устройства (с), не меньше таймаута подтверждения устройства
+        @return: Установленная скорость
+        """
+        self._checkStreamOwner()
+        stream = self._stream
+
+        if not isinstance(stream, BaudStream):
+            raise TypeError(f"{stream} does not support baud rate change")
+
+        for baud in rates:
+            if baud == stream.getBaud() or self._switchBaud(stream, baud, probes, timeout):
+                break
+
+        return stream.getBaud()
+
+    def hasVariableResponse(self, command: CommandBind) -> bool:
+        """Зависит ли размер ответа команды от состояния устройства (macroRun - от загруженного макроса)"""
+        return command is self._macro_run
+
+    def getStream(self) -> Stream:
+        """Получить стрим (Канал связи)"""
+        return self._stream
+
+    def probeLink(self, probes: int) -> bool:
+        """Проверить линию обменом пробными шаблонами"""
+        command = self._getServiceCommand(self._probe)
+
+        try:
+            return all(command.send(PROBE_PATTERN).unwrap() == PROBE_PATTERN for _ in range(probes))
+
+        except (struct.error, ValueError):
+            return False
+
+    def _switchBaud(self, stream: BaudStream, baud: int, probes: int, timeout: float) -> bool:
+        previous_baud = stream.getBaud()
+        previous_timeout = stream.getTimeout()
+        stream.setTimeout(timeout)
+
+        try:
+            stream.clearInput()
+            result = self._trySend(self._set_baud, baud)
+
+            if result is None:
+                # Ответ искажён: устройство могло переключиться, дождаться его отката
+                time.sleep(timeout)
+                stream.clearInput()
+                return False
+
+            if result.isErr():
+                return False
+
+            stream.setBaud(baud)
+
+            if not self.probeLink(probes):
+                time.sleep(timeout)
+                stream.setBaud(previous_baud)
+                stream.clearInput()
+                return False
+
+            if self._confirmBaud(stream, probes):
+                return True
+
+            # Подтверждение могло дойти до устройства при потерянном ответе: определить скорость устройства пробой
+            time.sleep(timeout)
+            stream.setBaud(previous_baud)
+            stream.clearInput()
+
+            if self.probeLink(probes):
+                return False
+
+            stream.setBaud(baud)
+            stream.clearInput()
+
+            if self.probeLink(probes):
+                return True
+
+            stream.setBaud(previous_baud)
+            stream.clearInput()
+            return False
+
+        finally:
+            stream.setTimeout(previous_timeout)
+
+    def _confirmBaud(self, stream: BaudStream, attempts: int) -> bool:
+        for _ in range(attempts):
+            stream.clearInput()
+            result = self._trySend(self._confirm_baud, None)
+
+            if result is not None and result.isOk():
+                return True
+
+        return False
+
+    def _trySend[S: Serializable, R: Serializable](self, command: Optional[CommandBind[S, R, E]], value: S) -> Optional[Result[R, E]]:
+        command = self._getServiceCommand(command)
+
+        try:
+            return command.send(value)
+
+        except (struct.error, ValueError):
+            return None
+
+    def _getServiceCommand[S: Serializable, R: Serializable](self, command: Optional[CommandBind[S, R, E]]) -> CommandBind[S, R, E]:
+        if command is None:
+            raise RuntimeError("Service commands are not added to protocol")
+
+        if self._recorders:
+            raise RuntimeError("Cannot send service commands while recording")
+
+        self._checkStreamOwner()
+        return command
+
+    def _checkStreamOwner(self) -> None:
+        if self._executors:
+            raise RuntimeError(f"Stream is owned by {self._executors[0]}")
+
+    def startExecutor(self, window: int = 8) -> CommandExecutor:
+        """
+        Запустить исполнитель команд в фоновом потоке
+        До его завершения стрим используется только им: прямая отправка команд вызывает RuntimeError
+        """
+        self._checkStreamOwner()
+        return CommandExecutor(self._stream, window, self._executors, self.hasVariableResponse)
+
     def getCommands(self) -> Iterable[CommandBind]:
         """Получить список команд"""
         return self._commands
@@ -1,9 +1,15 @@
 import struct
 from abc import ABC
 from abc import abstractmethod
+from dataclasses import fields
+from dataclasses import is_dataclass
 from itertools import chain
+from typing import Any
+from typing import Callable
+from typing import ClassVar
 from typing import Final
 from typing import Iterable
+from typing import Protocol
 from typing import Sequence
 
 from serialcmd.streams.abc import Stream
@@ -59,12 +65,47 @@ class _Format:
         raise ValueError(fmt)
 
 
+class _DataclassInstance(Protocol):
+    """Экземпляр dataclass"""
+
+    __dataclass_fields__: ClassVar[dict[str, Any]]
+
+
 _Ser_primitive = int | float | bool
 _Ser_struct = tuple[_Ser_primitive, ...]
-Serializable = _Ser_primitive | _Ser_struct | None
+_Ser_record = tuple[Any, ...] | _DataclassInstance
+Serializable = _Ser_primitive | _Ser_struct | _Ser_record | bytes | None
 """Serializable тип"""
 
 
+class _RecordCompiler:
+    """Генерация кода упаковки вложенных записей в один плоский struct"""
+
+    def __init__(self) -> None:
+        self.namespace = dict[str, Any]()
+        self._index = 0
+
+    def nextValue(self) -> str:
+        """Выражение следующего значения плоского кортежа"""
+        ret = f"v[{self._index}]"
+        self._index += 1
+        return ret
+
+    def addType(self, t: type) -> str:
+        """Имя типа в пространстве имён генерируемого кода"""
+        name = f"_t{len(self.namespace)}"
+        self.namespace[name] = t
+        return name
+
+    @classmethod
+    def build(cls, serializer: "Serializer") -> tuple[Callable[[tuple], Any], Callable[[Any, Callable[..., bytes]], bytes]]:
+        """Сгенерировать функции построения значения из плоского кортежа и упаковки значения"""
+        compiler = cls()
+        unpack = eval(f"lambda v: {serializer._compileUnpack(compiler)}", compiler.namespace)
+        pack = eval(f"lambda r, _pack: _pack({', '.join(serializer._compilePack('r'))})", compiler.namespace)
+        return unpack, pack
+
+
 class Serializer[T: Serializable](ABC):
     """Serializer - упаковка, распаковка данных"""
 
@@ -95,6 +136,18 @@ class Serializer[T: Serializable](ABC):
         """Получить спецификатор формата"""
         return self._struct.format.strip("<>")
 
+    def getDtype(self) -> Any:
+        """Получить эквивалентный numpy.dtype"""
+        raise TypeError(f"{self} has no numpy dtype")
+
+    def _compileUnpack(self, compiler: _RecordCompiler) -> str:
+        """Выражение построения значения из плоского кортежа значений"""
+        raise TypeError(f"{self} cannot be nested in a record")
+
+    def _compilePack(self, expr: str) -> list[str]:
+        """Выражения плоских значений для упаковки значения expr"""
+        raise TypeError(f"{self} cannot be nested in a record")
+
 
 class Primitive[T: _Ser_primitive](Serializer[T]):
     """Примитивные типы"""
@@ -105,6 +158,16 @@ class Primitive[T: _Ser_primitive](Serializer[T]):
     def unpack(self, buffer: bytes) -> T:
         return self._struct.unpack(buffer)[0]
 
+    def getDtype(self) -> Any:
+        import numpy
+        return numpy.dtype(f"<{_Format.matchPrefix(self.getFormat())}{self.getSize()}")
+
+    def _compileUnpack(self, compiler: _RecordCompiler) -> str:
+        return compiler.nextValue()
+
+    def _compilePack(self, expr: str) -> list[str]:
+        return [expr]
+
     def __str__(self) -> str:
         return f"{_Format.matchPrefix(self.getFormat())}{self.getSize() * 8}"
 
@@ -122,10 +185,123 @@ class Struct(Serializer[_Ser_struct]):
     def pack(self, fields: _Ser_struct) -> bytes:
         return self._struct.pack(*fields)
 
+    def getDtype(self) -> Any:
+        import numpy
+        return numpy.dtype([(f"f{i}", f.getDtype()) for i, f in enumerate(self._fields)])
+
+    def _compileUnpack(self, compiler: _RecordCompiler) -> str:
+        return f"({''.join(f'{f._compileUnpack(compiler)}, ' for f in self._fields)})"
+
+    def _compilePack(self, expr: str) -> list[str]:
+        return [f"{expr}[{i}]" for i in range(len(self._fields))]
+
     def __str__(self) -> str:
         return f"{{{', '.join(map(str, self._fields))}}}"
 
 
+class Array[T: Serializable](Serializer[tuple[T, ...]]):
+    """Массив фиксированной длины"""
+
+    def __init__(self, item: Serializer[T], length: int) -> None:
+        super().__init__(item.getFormat() * length)
+        self._item = item
+        self._length = length
+        self._unpack, self._pack = _RecordCompiler.build(self)
+
+    def unpack(self, buffer: bytes) -> tuple[T, ...]:
+        return self._unpack(self._struct.unpack(buffer))
+
+    def pack(self, value: tuple[T, ...]) -> bytes:
+        return self._pack(value, self._struct.pack)
+
+    def getDtype(self) -> Any:
+        import numpy
+        return numpy.dtype((self._item.getDtype(), (self._length,)))
+
+    def _compileUnpack(self, compiler: _RecordCompiler) -> str:
+        return f"({''.join(f'{self._item._compileUnpack(compiler)}, ' for _ in range(self._length))})"
+
+    def _compilePack(self, expr: str) -> list[str]:
+        return [e for i in range(self._length) for e in self._item._compilePack(f"{expr}[{i}]")]
+
+    def __str__(self) -> str:
+        return f"{self._item}[{self._length}]"
+
+
+class Record[T: _Ser_record](Serializer[T]):
+    """Запись (dataclass или NamedTuple) с вложенными записями и массивами, упакованная в один плоский struct"""
+
+    def __init__(self, record: type[T], fields_serializers: Sequence[Serializer]) -> None:
+        """
+        @param record: Класс записи (dataclass или NamedTuple)
+        @param fields_serializers: Типы полей записи в порядке их объявления
+        """
+        names = self._getFieldNames(record)
+
+        if len(names) != len(fields_serializers):
+            raise ValueError(f"{record.__name__} has {len(names)} fields, but {len(fields_serializers)} serializers given")
+
+        super().__init__(''.join(f.getFormat() for f in fields_serializers))
+        self._record = record
+        self._names = names
+        self._fields = fields_serializers
+        self._unpack, self._pack = _RecordCompiler.build(self)
+
+    @staticmethod
+    def _getFieldNames(record: type) -> tuple[str, ...]:
+        if is_dataclass(record):
+            return tuple(f.name for f in fields(record) if f.init)
+
+        if issubclass(record, tuple) and hasattr(record, "_fields"):
+            return record._fields
+
+        raise TypeError(f"{record} is not a dataclass or NamedTuple")
+
+    def unpack(self, buffer: bytes) -> T:
+        return self._unpack(self._struct.unpack(buffer))
+
+    def pack(self, value: T) -> bytes:
+        return self._pack(value, self._struct.pack)
+
+    def unpackMany(self, buffer: bytes) -> Any:
+        """Разобрать буфер из нескольких записей в структурированный numpy-массив"""
+        import numpy
+        return numpy.frombuffer(buffer, dtype=self.getDtype())
+
+    def getDtype(self) -> Any:
+        import numpy
+        return numpy.dtype([(name, f.getDtype()) for name, f in zip(self._names, self._fields)])
+
+    def _compileUnpack(self, compiler: _RecordCompiler) -> str:
+        return f"{compiler.addType(self._record)}({', '.join(f'{name}={f._compileUnpack(compiler)}' for name, f in zip(self._names, self._fields))})"
+
+    def _compilePack(self, expr: str) -> list[str]:
+        return [e for name, f in zip(self._names, self._fields) for e in f._compilePack(f"{expr}.{name}")]
+
+    def __str__(self) -> str:
+        return f"{self._record.__name__}{{{', '.join(map(str, self._fields))}}}"
+
+
+class Bytes(Serializer[bytes]):
+    """Байтовый массив переменной длины с префиксом размера"""
+
+    def __init__(self, length: Primitive[int]) -> None:
+        super().__init__(length.getFormat())
+        self._length = length
+
+    def pack(self, value: bytes) -> bytes:
+        return self._length.pack(len(value)) + value
+
+    def unpack(self, buffer: bytes) -> bytes:
+        return buffer[self._length.getSize():]
+
+    def read(self, stream: Stream) -> bytes:
+        return stream.read(self._length.read(stream))
+
+    def __str__(self) -> str:
+        return f"bytes<{self._length}>"
+
+
 u8 = Primitive[int | bool](_Format.U8)
 u16 = Primitive[int](_Format.U16)
 u32 = Primitive[int](_Format.U32)
@@ -149,6 +325,33 @@ def _test():
     r = s.unpack(bytes((0xA4, 0xA3, 0xA2, 0xA1, 0xB2, 0xB1, 0x69,)))  # r: tuple[int, int, int]
     print(r)
 
+    from dataclasses import dataclass
+    from typing import NamedTuple
+
+    class Point(NamedTuple):
+        x: float
+        y: float
+
+    @dataclass(frozen=True)
+    class Pid:
+        kp: float
+        ki: float
+        kd: float
+
+    @dataclass(frozen=True)
+    class MotorCommand:
+        speed: int
+        pid: Pid
+        path: tuple[Point, ...]
+
+    m = Record(MotorCommand, (i16, Record(Pid, (f32, f32, f32)), Array(Record(Point, (f32, f32)), 2)))
+    print(m, m.getFormat(), m.getSize())
+
+    value = MotorCommand(-100, Pid(1.0, 0.5, 0.25), (Point(1.0, 2.0), Point(3.0, 4.0)))
+    buffer = m.pack(value)
+    print(buffer.hex())
+    print(m.unpack(buffer) == value)
+
 
 if __name__ == '__main__':
     _test()
@@ -1,5 +1,6 @@
 from abc import ABC
 from abc import abstractmethod
+from typing import Optional
 
 
 class Stream(ABC):
@@ -12,3 +13,27 @@ class Stream(ABC):
     @abstractmethod
     def read(self, size: int = 1) -> bytes:
         """Считать данные из потока ввода"""
+
+
+class BaudStream(Stream):
+    """Стрим с настраиваемой скоростью и таймаутом чтения"""
+
+    @abstractmethod
+    def setBaud(self, baud: int) -> None:
+        """Установить скорость (бод)"""
+
+    @abstractmethod
+    def getBaud(self) -> int:
+        """Получить скорость (бод)"""
+
+    @abstractmethod
+    def setTimeout(self, timeout: Optional[float]) -> None:
+        """Установить таймаут чтения (с), None - блокирующее чтение"""
+
+    @abstractmethod
+    def getTimeout(self) -> Optional[float]:
+        """Получить таймаут чтения (с)"""
+
+    @abstractmethod
+    def clearInput(self) -> None:
+        """Отбросить принятые, но не считанные данные"""
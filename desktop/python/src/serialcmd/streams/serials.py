@@ -1,14 +1,15 @@
 from dataclasses import dataclass
 from typing import Iterable
+from typing import Optional
 
 import serial.tools.list_ports
 from serial import Serial as SerialPort
 
-from serialcmd.streams.abc import Stream
+from serialcmd.streams.abc import BaudStream
 
 
 @dataclass
-class Serial(Stream):
+class Serial(BaudStream):
     """Стрим по последовательному порту"""
 
     def __init__(self, port: str, baud: int) -> None:
@@ -20,6 +21,22 @@ class Serial(Stream):
     def write(self, data: bytes) -> None:
         self._serial_port.write(data)
 
+    def setBaud(self, baud: int) -> None:
+        self._serial_port.flush()
+        self._serial_port.baudrate = baud
+
+    def getBaud(self) -> int:
+        return self._serial_port.baudrate
+
+    def setTimeout(self, timeout: Optional[float]) -> None:
+        self._serial_port.timeout = timeout
+
+    def getTimeout(self) -> Optional[float]:
+        return self._serial_port.timeout
+
+    def clearInput(self) -> None:
+        self._serial_port.reset_input_buffer()
+
     @staticmethod
     def getPorts(keywords: Iterable[str] = ("Arduino", "CH340", "USB-SERIAL")) -> list[str]:
         """
@@ -0,0 +1,254 @@
+"""
+Оценка стоимости команд протокола на линии и сравнение с измерениями
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable
+from typing import Iterable
+from typing import Mapping
+from typing import Optional
+
+from serialcmd.core.bind import CommandBind
+from serialcmd.protocol import Protocol
+from serialcmd.serializers import Bytes
+from serialcmd.serializers import Serializable
+from serialcmd.serializers import Serializer
+
+
+@dataclass(frozen=True)
+class FrameFormat:
+    """Формат кадра последовательного порта (по умолчанию 8N1)"""
+
+    data_bits: int = 8
+    """Бит данных"""
+    parity_bits: int = 0
+    """Бит чётности"""
+    stop_bits: float = 1
+    """Стоповых бит"""
+
+    def getBits(self) -> float:
+        """Бит на линии на один байт (включая стартовый)"""
+        return 1 + self.data_bits + self.parity_bits + self.stop_bits
+
+    def __str__(self) -> str:
+        return f"{self.data_bits}{'N' if self.parity_bits == 0 else 'P'}{self.stop_bits:g}"
+
+
+@dataclass(frozen=True)
+class CommandCost:
+    """Размер команды на линии"""
+
+    name: str
+    """Имя команды"""
+    request_bytes: int
+    """Байт запроса (код и аргументы)"""
+    response_bytes: int
+    """Байт успешного ответа (код результата и значение)"""
+    request_variable: bool = False
+    """Переменная ли длина запроса (указан минимальный размер)"""
+    response_variable: bool = False
+    """Переменная ли длина ответа (указан минимальный размер)"""
+
+    def getWireTime(self, baud: int, frame: FrameFormat = FrameFormat()) -> float:
+        """Минимальное время передачи запроса и ответа (с)"""
+        return (self.request_bytes + self.response_bytes) * frame.getBits() / baud
+
+    def getMaxCallsPerSecond(self, baud: int, frame: FrameFormat = FrameFormat()) -> float:
+        """Теоретический предел вызовов в секунду при последовательном обмене"""
+        return 1 / self.getWireTime(baud, frame)
+
+
+@dataclass(frozen=True)
+class CommandReport:
+    """Сравнение оценки команды с измерением"""
+
+    cost: CommandCost
+    """Размер команды на линии"""
+    wire_time: float
+    """Минимальное время на линии (с)"""
+    measured_time: Optional[float]
+    """Измеренное время одного вызова (с)"""
+
+    def getMeasuredTime(self) -> Optional[float]:
+        """Измеренное время вызова (с), если оно пригодно для сравнения (нулевое время от грубых часов - нет)"""
+        if self.measured_time is None or self.measured_time <= 0:
+            return None
+
+        return self.measured_time
+
+    def getOverhead(self) -> Optional[float]:
+        """Время вызова сверх передачи данных: задержки драйвера, USB, обработки (с)"""
+        measured_time = self.getMeasuredTime()
+
+        if measured_time is None:
+            return None
+
+        return max(measured_time - self.wire_time, 0.0)
+
+    def getOverheadShare(self) -> Optional[float]:
+        """Доля накладных расходов в измеренном времени вызова"""
+        measured_time = self.getMeasuredTime()
+
+        if measured_time is None:
+            return None
+
+        return self.getOverhead() / measured_time
+
+    def isLatencyBound(self, threshold: float = 0.5) -> bool:
+        """Определяется ли время вызова задержками, а не объёмом данных (кандидат на пакетирование и конвейер)"""
+        share = self.getOverheadShare()
+        return share is not None and share > threshold
+
+    def __str__(self) -> str:
+        size = f"{self.cost.request_bytes}{'+' if self.cost.request_variable else ''} / {self.cost.response_bytes}{'+' if self.cost.response_variable else ''} B"
+        ret = f"{self.cost.name}: {size}, wire {self.wire_time * 1e3:.3f} ms ({1 / self.wire_time:.0f}/s)"
+
+        measured_time = self.getMeasuredTime()
+
+        if measured_time is None:
+            return ret
+
+        ret += f", measured {measured_time * 1e3:.3f} ms ({1 / measured_time:.0f}/s), overhead {self.getOverheadShare():.0%}"
+
+        if self.isLatencyBound():
+            ret += " [latency bound]"
+
+        return ret
+
+
+def _getSize(serializer: Optional[Serializer]) -> int:
+    return 0 if serializer is None else serializer.getSize()
+
+
+def _isVariable(serializer: Optional[Serializer]) -> bool:
+    return isinstance(serializer, Bytes)
+
+
+def getCommandCost(command: CommandBind, variable_response: bool = False) -> CommandCost:
+    """
+    Оценить размер команды на линии
+    @param command: Команда
+    @param variable_response: Зависит ли ответ от состояния устройства (например, macroRun)
+    """
+    c = command.getCommand()
+    return CommandCost(
+        c.instruction.name,
+        len(c.instruction.code) + _getSize(c.instruction.signature),
+        c.respond_policy.error_primitive.getSize() + _getSize(c.returns),
+        _isVariable(c.instruction.signature),
+        variable_response or _isVariable(c.returns)
+    )
+
+
+def measureCommands(
+        protocol: Protocol,
+        values: Mapping[str, Serializable],
+        calls: int = 100,
+        clock: Callable[[], float] = time.perf_counter
+) -> dict[str, float]:
+    """
+    Измерить среднее время вызова команд в живом или эмулированном сеансе
+    @param protocol: Протокол
+    @param values: Аргументы измеряемых команд по имени (остальные команды не вызываются)
+    @param calls: Количество вызовов каждой команды
+    @param clock: Часы измерения (с)
+    @return: Среднее время успешного вызова (с) по имени команды (вызовы с ошибкой не учитываются, команда без успешных вызовов не попадает в результат)
+    """
+    ret = dict[str, float]()
+
+    for command in protocol.getCommands():
+        name = command.getCommand().instruction.name
+
+        if name not in values:
+            continue
+
+        total = 0.0
+        succeeded = 0
+
+        for _ in range(calls):
+            start = clock()
+            result = command.send(values[name])
+            end = clock()
+
+            if result.isOk():
+                total += end - start
+                succeeded += 1
+
+        if succeeded > 0:
+            ret[name] = total / succeeded
+
+    return ret
+
+
+def analyze(
+        protocol: Protocol,
+        baud: int,
+        frame: FrameFormat = FrameFormat(),
+        measurements: Optional[Mapping[str, float]] = None,
+        sizes: Optional[Mapping[str, tuple[int, int]]] = None
+) -> list[CommandReport]:
+    """
+    Оценить стоимость всех команд протокола
+    @param protocol: Протокол
+    @param baud: Скорость линии
+    @param frame: Формат кадра
+    @param measurements: Измеренное время вызова (с) по имени команды (measureCommands)
+    @param sizes: Точные размеры (запрос, ответ) в байтах по имени команды, например для загруженного макроса
+    """
+    measurements = measurements or {}
+    sizes = sizes or {}
+    ret = list[CommandReport]()
+
+    for command in protocol.getCommands():
+        cost = getCommandCost(command, protocol.hasVariableResponse(command))
+
+        if cost.name in sizes:
+            cost = CommandCost(cost.name, *sizes[cost.name])
+
+        ret.append(CommandReport(cost, cost.getWireTime(baud, frame), measurements.get(cost.name)))
+
+    return ret
+
+
+def formatReport(reports: Iterable[CommandReport], baud: int, frame: FrameFormat = FrameFormat()) -> str:
+    """Текстовый отчёт"""
+    return "\n".join((f"{baud} baud {frame}", *map(str, reports)))
+
+
+def _test():
+    from serialcmd.core.respond import RespondPolicy
+    from serialcmd.emulator.device import Emulator
+    from serialcmd.emulator.link import SimulatedLink
+    from serialcmd.errorenum import ErrorEnum
+    from serialcmd.serializers import Array
+    from serialcmd.serializers import u8
+    from serialcmd.streams.abc import Stream
+
+    class TestError(ErrorEnum):
+        ok = 0x00
+
+    def _ping(stream: Stream) -> None:
+        u8.write(stream, TestError.ok)
+
+    def _dump(stream: Stream) -> None:
+        size = u8.read(stream)
+        u8.write(stream, TestError.ok)
+        stream.write(bytes(size) + bytes(255 - size))
+
+    link = SimulatedLink(115200, latency=0.001)
+    emulator = Emulator((_ping, _dump), u8, link)
+    emulator.begin(u8, 0x01)
+
+    protocol = Protocol[TestError, int](RespondPolicy(TestError, u8), u8, emulator, u8)
+    protocol.addCommand("ping", None, None)
+    protocol.addCommand("dump", u8, Array(u8, 255))
+    protocol.addMacroCommands(u8)
+    protocol.begin()
+
+    measurements = measureCommands(protocol, {"ping": None, "dump": 0}, clock=link.getTime)
+    print(formatReport(analyze(protocol, 115200, measurements=measurements, sizes={"macroLoad": (34, 1)}), 115200))
+
+
+if __name__ == '__main__':
+    _test()
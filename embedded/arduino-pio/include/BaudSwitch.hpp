@@ -0,0 +1,72 @@
+#pragma once
+
+#include <Arduino.h>
+
+#include "serialcmd/Types.hpp"
+#include "serialcmd/StreamSerializer.hpp"
+
+
+/// Смена скорости по запросу хоста с откатом при отсутствии подтверждения
+namespace baud {
+    using serialcmd::StreamSerializer;
+
+    using serialcmd::u8;
+    using serialcmd::u32;
+
+    /// Размер пробного шаблона (serialcmd.protocol.PROBE_PATTERN)
+    constexpr u8 probe_size = 8;
+
+    class Switch {
+        HardwareSerial &serial;
+        const u32 timeout_ms;
+        u32 baud;
+        u32 fallback_baud{0};
+        u32 switched_at{0};
+
+    public:
+        /// Коды команд probe и confirmBaud (доступны во время ожидания подтверждения)
+        const u8 probe_code, confirm_code;
+
+        Switch(HardwareSerial &serial, u32 startup_baud, u8 probe_code, u8 confirm_code, u32 timeout_ms = 200) :
+            serial(serial), timeout_ms(timeout_ms), baud(startup_baud), probe_code(probe_code), confirm_code(confirm_code) {}
+
+        u32 getBaud() const { return baud; }
+
+        bool isPending() const { return fallback_baud != 0; }
+
+        /// Переключиться на новую скорость, ответ ok должен быть уже записан
+        void begin(u32 new_baud) {
+            if (not isPending()) { fallback_baud = baud; }
+
+            baud = new_baud;
+            serial.flush();
+            serial.begin(baud);
+            switched_at = ::millis();
+        }
+
+        /// Закрепить новую скорость
+        void confirm() { fallback_baud = 0; }
+
+        /// Обработка во время ожидания подтверждения: принимаются только probe и confirmBaud
+        void poll(void (*handlers[])(StreamSerializer &)) {
+            if (::millis() - switched_at > timeout_ms) {
+                baud = fallback_baud;
+                fallback_baud = 0;
+                serial.begin(baud);
+
+                while (serial.available() > 0) { serial.read(); }
+
+                return;
+            }
+
+            if (serial.available() < 1) { return; }
+
+            const u8 code = serial.read();
+
+            if (code != probe_code and code != confirm_code) { return; }
+
+            StreamSerializer serializer(serial);
+            handlers[code](serializer);
+        }
+    };
+}
@@ -0,0 +1,183 @@
+#pragma once
+
+#include <Arduino.h>
+
+#include "serialcmd/Types.hpp"
+#include "serialcmd/StreamSerializer.hpp"
+
+
+/// Исполнение макросов (программ из вызовов команд), записанных на стороне хоста
+namespace macro {
+    using serialcmd::StreamSerializer;
+
+    using serialcmd::u8;
+    using serialcmd::u16;
+    using serialcmd::u32;
+
+    /// Коды операций байт-кода (serialcmd.core.macro.MacroOpcode)
+    enum Opcode : u8 {
+        /// call<u8 code, u8 size, args>
+        call = 0x01,
+        /// loop<u16 count>
+        loop = 0x02,
+        /// end
+        end = 0x03,
+        /// delay<u32 ms>
+        delay = 0x04
+    };
+
+    /// Стрим исполнения команды из памяти: аргументы читаются из буфера, ответ пишется в выходной поток
+    class ArgsStream : public Stream {
+        const u8 *args;
+        const u8 size;
+        u8 position{0};
+        Stream &output;
+
+    public:
+        ArgsStream(const u8 *args, u8 size, Stream &output) :
+            args(args), size(size), output(output) {}
+
+        int available() override { return size - position; }
+
+        int read() override { return position < size ? args[position++] : -1; }
+
+        int peek() override { return position < size ? args[position] : -1; }
+
+        size_t write(uint8_t value) override { return output.write(value); }
+
+        size_t write(const uint8_t *buffer, size_t length) override { return output.write(buffer, length); }
+
+        void flush() override { output.flush(); }
+    };
+
+    /// Интерпретатор макросов
+    /// @tparam capacity Максимальный размер программы
+    /// @tparam max_depth Максимальная вложенность циклов
+    template<u8 capacity, u8 max_depth = 4> class Interpreter {
+        typedef void(*Cmd)(StreamSerializer &);
+
+        const Cmd *commands;
+        /// Коды команд, которые можно вызывать из макроса
+        const u8 *callable;
+        const u8 callable_count;
+        u8 program[capacity]{};
+        u8 length{0};
+
+    public:
+        Interpreter(const Cmd *commands, const u8 *callable, u8 callable_count) :
+            commands(commands), callable(callable), callable_count(callable_count) {}
+
+        /// Загрузить программу (bytes<u8>) из потока
+        bool load(StreamSerializer &serializer) {
+            u8 size;
+            serializer.read(size);
+
+            length = 0;
+
+            for (u8 i = 0; i < size; i++) {
+                u8 b;
+                serializer.read(b);
+
+                if (i < capacity) { program[i] = b; }
+            }
+
+            if (size > capacity or not isValid(size)) { return false; }
+
+            length = size;
+            return true;
+        }
+
+        bool isLoaded() const { return length > 0; }
+
+        /// Исполнить программу, ответы команд пишутся в output
+        void run(Stream &output) {
+            struct { u8 start; u16 remaining; } loops[max_depth];
+            u8 depth = 0;
+            u8 pc = 0;
+
+            while (pc < length) {
+                switch (program[pc++]) {
+                    case Opcode::call: {
+                        const u8 code = program[pc];
+                        const u8 size = program[pc + 1];
+                        pc += 2;
+
+                        ArgsStream args(program + pc, size, output);
+                        StreamSerializer serializer(args);
+                        commands[code](serializer);
+
+                        pc += size;
+                        break;
+                    }
+
+                    case Opcode::loop:
+                        memcpy(&loops[depth].remaining, program + pc, sizeof(u16));
+                        pc += sizeof(u16);
+                        loops[depth].start = pc;
+                        depth++;
+                        break;
+
+                    case Opcode::end:
+                        if (--loops[depth - 1].remaining > 0) {
+                            pc = loops[depth - 1].start;
+                        } else {
+                            depth--;
+                        }
+                        break;
+
+                    case Opcode::delay: {
+                        u32 duration;
+                        memcpy(&duration, program + pc, sizeof(u32));
+                        pc += sizeof(u32);
+                        ::delay(duration);
+                        break;
+                    }
+                }
+            }
+        }
+
+    private:
+        bool isCallable(u8 code) const {
+            for (u8 i = 0; i < callable_count; i++) {
+                if (callable[i] == code) { return true; }
+            }
+
+            return false;
+        }
+
+        bool isValid(u8 size) const {
+            u8 depth = 0;
+            u16 pc = 0;
+
+            while (pc < size) {
+                switch (program[pc++]) {
+                    case Opcode::call:
+                        if (pc + 2 > size or not isCallable(program[pc])) { return false; }
+                        pc += 2 + program[pc + 1];
+                        break;
+
+                    case Opcode::loop:
+                        if (pc + sizeof(u16) > size or depth == max_depth) { return false; }
+                        if (program[pc] == 0 and program[pc + 1] == 0) { return false; }
+                        pc += sizeof(u16);
+                        depth++;
+                        break;
+
+                    case Opcode::end:
+                        if (depth == 0) { return false; }
+                        depth--;
+                        break;
+
+                    case Opcode::delay:
+                        pc += sizeof(u32);
+                        break;
+
+                    default:
+                        return false;
+                }
+            }
+
+            return depth == 0 and pc == size;
+        }
+    };
+}
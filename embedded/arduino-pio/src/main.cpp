@@ -1,6 +1,8 @@
 #include "serialcmd/Types.hpp"
 #include "serialcmd/StreamSerializer.hpp"
 #include "serialcmd/Protocol.hpp"
+#include "Macro.hpp"
+#include "BaudSwitch.hpp"
 
 #include <Arduino.h>
 
@@ -82,6 +84,24 @@ namespace cmd {
         serializer.write(Result::ok);
     }
 
+    void macro_load(StreamSerializer &serializer);
+
+    void macro_run(StreamSerializer &serializer);
+
+    void set_baud(StreamSerializer &serializer);
+
+    void probe(StreamSerializer &serializer);
+
+    void confirm_baud(StreamSerializer &serializer);
+
+    /// micros<0A>(None) -> (u32, ArduinoError<u8>)
+    void micros(StreamSerializer &serializer) {
+        u32 ret = ::micros();
+
+        serializer.write(Result::ok);
+        serializer.write(ret);
+    }
+
     typedef void(*Cmd)(StreamSerializer &);
 
     Cmd commands[] = {
@@ -89,18 +109,82 @@ namespace cmd {
         digital_write,
         digital_read,
         millis,
-        delay
+        delay,
+        macro_load,
+        macro_run,
+        set_baud,
+        probe,
+        confirm_baud,
+        micros
     };
+
+    /// Команды, доступные из макроса: pinMode, digitalWrite, digitalRead, millis, delay, micros
+    /// (без команд макросов и смены скорости), как arduino.MACRO_COMMANDS
+    const u8 macro_commands[] = {0x00, 0x01, 0x02, 0x03, 0x04, 0x0A};
+
+    macro::Interpreter<128> interpreter(commands, macro_commands, sizeof(macro_commands));
+
+    /// macroLoad<05>(bytes<u8>) -> (None, ArduinoError<u8>)
+    void macro_load(StreamSerializer &serializer) {
+        serializer.write(interpreter.load(serializer) ? Result::ok : Result::error);
+    }
+
+    /// macroRun<06>(None) -> (None, ArduinoError<u8>), затем ответы всех вызовов макроса
+    void macro_run(StreamSerializer &serializer) {
+        if (not interpreter.isLoaded()) {
+            serializer.write(Result::error);
+            return;
+        }
+
+        serializer.write(Result::ok);
+        interpreter.run(Serial);
+    }
+
+    baud::Switch baud_switch(Serial, 115200, 8, 9);
+
+    /// setBaud<07>(u32) -> (None, ArduinoError<u8>), ответ на прежней скорости
+    void set_baud(StreamSerializer &serializer) {
+        u32 v;
+        serializer.read(v);
+
+        if (v < 1200 or v > 2000000) {
+            serializer.write(Result::error);
+            return;
+        }
+
+        serializer.write(Result::ok);
+        baud_switch.begin(v);
+    }
+
+    /// probe<08>(u8[8]) -> (u8[8], ArduinoError<u8>)
+    void probe(StreamSerializer &serializer) {
+        u8 pattern[baud::probe_size];
+        serializer.read(pattern);
+
+        serializer.write(Result::ok);
+        serializer.write(pattern);
+    }
+
+    /// confirmBaud<09>(None) -> (None, ArduinoError<u8>), повторное подтверждение также успешно
+    void confirm_baud(StreamSerializer &serializer) {
+        baud_switch.confirm();
+        serializer.write(Result::ok);
+    }
 }
 
 
-serialcmd::Protocol<uint8_t, uint8_t> protocol(cmd::commands, 5, Serial);
+serialcmd::Protocol<uint8_t, uint8_t> protocol(cmd::commands, 11, Serial);
 
 void setup() {
-    Serial.begin(115200);
+    Serial.begin(cmd::baud_switch.getBaud());
     protocol.begin(0x01);
 }
 
 void loop() {
+    if (cmd::baud_switch.isPending()) {
+        cmd::baud_switch.poll(cmd::commands);
+        return;
+    }
+
     protocol.pull();
 }